@@ -3,141 +3,226 @@
 Daily health dashboard updater.
 Reads the day's food log from memory/health/YYYY-MM-DD.md,
 pulls Fitbit data, appends to health-data.json, builds & deploys.
+Pass one or more YYYY-MM-DD dates to backfill; defaults to yesterday.
 """
-import os, sys, re, json, subprocess
+import os, sys, re, json, bisect, hashlib, shutil, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import re2 as _re
+except ImportError:
+    _re = re
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 DASHBOARD_DIR = SCRIPT_DIR.parent
 DATA_FILE = DASHBOARD_DIR / "src" / "data" / "health-data.json"
 MEMORY_HEALTH_DIR = Path.home() / ".openclaw" / "workspace" / "memory" / "health"
 FITBIT_DIR = Path.home() / "Projects" / "fitbit"
+CACHE_DIR = Path.home() / ".cache" / "health-dashboard"
+FITBIT_CACHE_DIR = CACHE_DIR / "fitbit"
+DEPLOY_HASH_FILE = CACHE_DIR / "last-deploy.hash"
 
 sys.path.insert(0, str(FITBIT_DIR))
 
+try:
+    from fitbit_api import api_get
+    _fitbit_import_error = None
+except Exception as e:
+    # Dashboard still updates from the food log without Fitbit
+    api_get = None
+    _fitbit_import_error = e
+
+# Food log patterns
+TOTALS_LINE_RE = re.compile(r"\*\*(?:Daily totals|Running total)[^*\n]*\*\*([^\n]*)", re.IGNORECASE)
+MACROS_RE = re.compile(
+    r"~?(\d[\d,]*)\s*cal|~?([\d.]+)\s*g\s*protein|~?([\d.]+)\s*g\s*fat|~?([\d.]+)\s*g\s*carb",
+    re.IGNORECASE
+)
+MACRO_KEYS = {1: "calories", 2: "protein", 3: "fat", 4: "carbs"}
+SECTION_SPLIT_RE = re.compile(r'^## ', re.MULTILINE)
+SECTION_TIME_RE = re.compile(r'.*?\(~?([\d:]+\s*(?:AM|PM|am|pm)?)\)')
+SECTION_NAME_RE = re.compile(r'(\w[\w\s&]*)')
+ITEM_BLOCK_RE = re.compile(
+    r'^(?P<line>[ \t]*-[ \t]+\*\*(?P<name>.+?)\*\*[^\n]*)'
+    r'(?:\n(?P<sub>[ \t]+-[ \t]+~?[\d,]+\s*cal[^\n]*))?',
+    re.MULTILINE
+)
+CAL_ON_LINE_RE = re.compile(r'[—\-]+\s*~?([\d,]+)\s*cal')
+SUB_CAL_RE = re.compile(r'\s+-\s+~?([\d,]+)\s*cal')
+PROTEIN_RE = re.compile(r'([\d.]+)g\s*protein')
+FAT_RE = re.compile(r'([\d.]+)g\s*fat')
+CARBS_RE = re.compile(r'([\d.]+)g\s*carb')
+
+# "### Workout" style subsections inside another "## " section
+WORKOUT_SUBHEADER_RE = re.compile(r'^#{3,} Workout[^\n]*\n', re.IGNORECASE | re.MULTILINE)
+
+# Workout patterns (RE2-compatible, so they get a linear-time engine when it's
+# installed). Under RE2, \s and \d are ASCII-only, so e.g. "70\xa0lbs" (with a
+# non-breaking space) only parses when falling back to the stdlib re module.
+EX_RE = _re.compile(r'\s*\d+\.\s+(.+?)\s*(?:\(.*?\))?\s*[—\-]+\s*(\d+)\s*(?:lbs?|pounds?)')
+SETS_RE = _re.compile(r'(\d+)\s*[×x]\s*(\d+)')
+VAR_REPS_RE = _re.compile(r'sets?\s*\(([^)]+)\)')
+
+
+def json_loads(raw):
+    """Decode JSON bytes, using orjson's C parser when it's installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_dumps(obj):
+    """Encode obj as indent=2 JSON bytes, using orjson when it's installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    # ensure_ascii=False so both backends write byte-identical UTF-8
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode()
+
+
+def to_int(s):
+    """Truncate a numeric string to int, only going through float for decimals."""
+    return int(s) if "." not in s else int(float(s))
+
 
 def get_yesterday():
     """Default to yesterday since this runs after midnight."""
     return (date.today() - timedelta(days=1)).isoformat()
 
 
-def parse_food_log(date_str):
-    """Parse a memory/health/YYYY-MM-DD.md file into meals and totals."""
+def load_log(date_str):
+    """Read memory/health/YYYY-MM-DD.md, or None if there's no log for that day."""
     log_file = MEMORY_HEALTH_DIR / f"{date_str}.md"
-    if not log_file.exists():
+    try:
+        return log_file.read_text()
+    except FileNotFoundError:
         print(f"No food log found for {date_str}")
-        return None, None
+        return None
+
+
+def split_sections(content):
+    """Split a daily health log on its "## " headers; the first chunk is the preamble."""
+    return SECTION_SPLIT_RE.split(content)
 
-    content = log_file.read_text()
-    meals = []
-    totals = {"calories": 0, "protein": 0, "fat": 0, "carbs": 0}
 
-    # Parse daily totals line if present
-    totals_match = re.search(
-        r"\*\*(?:Daily totals|Running total)[^*]*\*\*[:\s]*~?([\d,]+)\s*cal.*?~?([\d.]+)g\s*protein",
-        content, re.IGNORECASE
-    )
-    if totals_match:
-        totals["calories"] = int(totals_match.group(1).replace(",", ""))
-        totals["protein"] = int(float(totals_match.group(2)))
-
-    # Try to get fat and carbs from totals line
-    fat_match = re.search(
-        r"\*\*(?:Daily totals|Running total)[^*]*\*\*.*?~?([\d.]+)g\s*fat",
-        content, re.IGNORECASE
-    )
-    carbs_match = re.search(
-        r"\*\*(?:Daily totals|Running total)[^*]*\*\*.*?~?([\d.]+)g\s*carb",
-        content, re.IGNORECASE
-    )
-    if fat_match:
-        totals["fat"] = int(float(fat_match.group(1)))
-    if carbs_match:
-        totals["carbs"] = int(float(carbs_match.group(1)))
+def parse_totals(content):
+    """Pull calories and macros from the **Daily totals** / **Running total** lines.
+
+    Calories and protein come from the first such line that has both, so a
+    partial running total doesn't shadow the day's real totals; fat and carbs
+    come from the first line that mentions each.
+
+    >>> parse_totals("**Running total:** 95g protein, calories pending")
+    {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
+    >>> parse_totals("**Daily totals:** 150g protein, calories ~1,800")
+    {'calories': 0, 'protein': 0, 'fat': 0, 'carbs': 0}
+    >>> parse_totals("**Running total:** 800 cal so far\\n"
+    ...              "**Daily totals:** 2,000 cal, 150g protein, 60g fat, 100g carbs")
+    {'calories': 2000, 'protein': 150, 'fat': 60, 'carbs': 100}
+    """
+    totals = {"calories": 0, "protein": 0, "fat": 0, "carbs": 0}
+    found = set()
+
+    # One pass over each totals line pulls all of its macros
+    for totals_line in TOTALS_LINE_RE.finditer(content):
+        line_totals = {}
+        for m in MACROS_RE.finditer(totals_line.group(1)):
+            line_totals.setdefault(MACRO_KEYS[m.lastindex], m.group(m.lastindex))
+
+        if "calories" not in found and "calories" in line_totals and "protein" in line_totals:
+            keys = ["calories", "protein"]
+        else:
+            keys = []
+        keys += [k for k in ("fat", "carbs") if k not in found and k in line_totals]
+        for key in keys:
+            totals[key] = to_int(line_totals[key].replace(",", ""))
+            found.add(key)
+        if len(found) == 4:
+            break
+    return totals
+
+
+def parse_food_log(content, sections):
+    """Parse the contents of a daily health log into meals and totals."""
+    meals = []
+    totals = parse_totals(content)
 
     # Parse individual meal items: lines starting with "- **item name**"
     current_time = ""
-    # Find section headers with times like "## Lunch" or "## Evening Snacks (~4:30 PM)"
-    sections = re.split(r'^## ', content, flags=re.MULTILINE)
-
+    meal_cal = meal_pro = meal_fat = meal_carb = 0
+    # Section headers look like "## Lunch" or "## Evening Snacks (~4:30 PM)"
     for section in sections:
         # Extract time from section header
-        time_match = re.match(r'.*?\(~?([\d:]+\s*(?:AM|PM|am|pm)?)\)', section)
-        section_name_match = re.match(r'(\w[\w\s&]*)', section)
+        time_match = SECTION_TIME_RE.match(section)
+        section_name_match = SECTION_NAME_RE.match(section)
 
         if time_match:
             current_time = time_match.group(1).strip()
         elif section_name_match:
             current_time = section_name_match.group(1).strip()
 
+        # Cheap substring check so sections with no bold text (workouts, notes)
+        # never enter the regex engine; ITEM_BLOCK_RE allows any spacing
+        # between "-" and "**", so don't test for more than "**" here
+        if "**" not in section:
+            continue
+
         # Find food items in two formats:
         # Format 1: "- **name** — Xcal, Xg protein, ..."
         # Format 2: "- **name** (...)\n  - ~Xcal, ~Xg protein, ..."
-        lines = section.split('\n')
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
-            # Match a bold food item
-            item_match = re.match(r'\s*-\s+\*\*(.+?)\*\*', line)
-            if item_match:
-                name = item_match.group(1).strip()
-                cal = 0
-                protein = 0
-                fat = 0
-                carbs = 0
-
-                # Check if calories are on this line (Format 1)
-                cal_on_line = re.search(r'[—\-]+\s*~?([\d,]+)\s*cal', line)
-                if cal_on_line:
-                    parse_line = line
-                    cal = int(cal_on_line.group(1).replace(",", ""))
-                else:
-                    # Check next line for sub-bullet with calories (Format 2)
-                    if i + 1 < len(lines):
-                        next_line = lines[i + 1]
-                        sub_cal = re.match(r'\s+-\s+~?([\d,]+)\s*cal', next_line)
-                        if sub_cal:
-                            parse_line = next_line
-                            cal = int(sub_cal.group(1).replace(",", ""))
-                            i += 1  # consume the sub-bullet
-                        else:
-                            # No calories found, skip (e.g. "Ice water")
-                            i += 1
-                            continue
-                    else:
-                        i += 1
-                        continue
-
-                p_match = re.search(r'([\d.]+)g\s*protein', parse_line)
-                f_match = re.search(r'([\d.]+)g\s*fat', parse_line)
-                c_match = re.search(r'([\d.]+)g\s*carb', parse_line)
-
-                if p_match:
-                    protein = int(float(p_match.group(1)))
-                if f_match:
-                    fat = int(float(f_match.group(1)))
-                if c_match:
-                    carbs = int(float(c_match.group(1)))
-
-                meals.append({
-                    "time": current_time,
-                    "name": name,
-                    "calories": cal,
-                    "protein": protein,
-                    "fat": fat,
-                    "carbs": carbs
-                })
-            i += 1
+        for item in ITEM_BLOCK_RE.finditer(section):
+            name = item["name"].strip()
+            cal = 0
+            protein = 0
+            fat = 0
+            carbs = 0
+
+            # Check if calories are on this line (Format 1)
+            cal_on_line = CAL_ON_LINE_RE.search(item["line"])
+            if cal_on_line:
+                parse_line = item["line"]
+                cal = int(cal_on_line.group(1).replace(",", ""))
+            elif item["sub"]:
+                # Sub-bullet with calories on the next line (Format 2)
+                parse_line = item["sub"]
+                cal = int(SUB_CAL_RE.match(parse_line).group(1).replace(",", ""))
+            else:
+                # No calories found, skip (e.g. "Ice water")
+                continue
+
+            p_match = PROTEIN_RE.search(parse_line)
+            f_match = FAT_RE.search(parse_line)
+            c_match = CARBS_RE.search(parse_line)
+
+            if p_match:
+                protein = to_int(p_match.group(1))
+            if f_match:
+                fat = to_int(f_match.group(1))
+            if c_match:
+                carbs = to_int(c_match.group(1))
+
+            meals.append({
+                "time": current_time,
+                "name": name,
+                "calories": cal,
+                "protein": protein,
+                "fat": fat,
+                "carbs": carbs
+            })
+            meal_cal += cal
+            meal_pro += protein
+            meal_fat += fat
+            meal_carb += carbs
 
     # Fill in any missing totals from meal sums
     if meals:
-        meal_cal = sum(m["calories"] for m in meals)
-        meal_pro = sum(m["protein"] for m in meals)
-        meal_fat = sum(m["fat"] for m in meals)
-        meal_carb = sum(m["carbs"] for m in meals)
         if totals["calories"] == 0:
             totals["calories"] = meal_cal
         if totals["protein"] == 0:
@@ -150,36 +235,41 @@ def parse_food_log(date_str):
     return meals, totals
 
 
-def parse_workouts(date_str):
-    """Parse workout entries from the food log (they're in the same file)."""
-    log_file = MEMORY_HEALTH_DIR / f"{date_str}.md"
-    if not log_file.exists():
-        return []
-
-    content = log_file.read_text()
+def parse_workouts(sections):
+    """Parse workout entries from the food log sections (they're in the same file)."""
     workouts = []
 
-    # Look for workout section
-    workout_section = re.search(r'## Workout.*?\n(.*?)(?=\n## |\Z)', content, re.DOTALL | re.IGNORECASE)
-    if not workout_section:
+    # Look for a "## Workout" section, or a "### Workout" subsection, which
+    # runs to the end of its enclosing "## " section
+    for i, section in enumerate(sections):
+        if i and section[:7].lower() == "workout":
+            body = section.partition("\n")[2]
+            break
+        sub = WORKOUT_SUBHEADER_RE.search(section)
+        if sub:
+            body = section[sub.end():]
+            break
+    else:
         return []
 
     # Parse exercise lines like "1. Pectoral Fly (Life Fitness) — 70 lbs, 4×10"
-    for line in workout_section.group(1).split('\n'):
-        ex_match = re.match(
-            r'\s*\d+\.\s+(.+?)\s*(?:\(.*?\))?\s*[—\-]+\s*(\d+)\s*(?:lbs?|pounds?)',
-            line
-        )
+    for line in body.splitlines():
+        # Only numbered lines can be exercises; skip blanks and notes cheaply
+        stripped = line.lstrip()
+        if not stripped or not stripped[0].isdigit():
+            continue
+
+        ex_match = EX_RE.match(line)
         if ex_match:
             name = ex_match.group(1).strip()
             weight = int(ex_match.group(2))
 
-            sets_match = re.search(r'(\d+)\s*[×x]\s*(\d+)', line)
+            sets_match = SETS_RE.search(line)
             sets = int(sets_match.group(1)) if sets_match else 0
             reps = sets_match.group(2) if sets_match else "0"
 
             # Check for variable reps like "3 sets (10, 10, 6)"
-            var_reps = re.search(r'sets?\s*\(([^)]+)\)', line)
+            var_reps = VAR_REPS_RE.search(line)
             if var_reps:
                 reps = var_reps.group(1).replace(" ", "")
 
@@ -193,19 +283,87 @@ def parse_workouts(date_str):
     return workouts
 
 
+# fitbit_api isn't known to be thread-safe: it may refresh the OAuth token, and
+# Fitbit refresh tokens are single-use. Real API calls are serialized until one
+# has succeeded (so any refresh has happened once); after that they overlap.
+_api_lock = threading.Lock()
+_api_ready = threading.Event()
+
+
+def locked_api_get(endpoint):
+    """api_get, run one at a time until the first call in this process succeeds."""
+    if not _api_ready.is_set():
+        with _api_lock:
+            if not _api_ready.is_set():
+                result = api_get(endpoint)
+                _api_ready.set()
+                return result
+    return api_get(endpoint)
+
+
+def cached_api_get(endpoint, date_str):
+    """api_get with an on-disk cache for older dates, so backfills don't re-hit Fitbit.
+
+    Cached files never expire, so only settled data is cached: nothing from
+    today or yesterday (the nightly run fetches yesterday shortly after
+    midnight, possibly before the tracker has synced), and only responses
+    that carry the data we read.
+    """
+    # Today's and yesterday's numbers may still change, always go to the API
+    if date_str >= get_yesterday():
+        return locked_api_get(endpoint)
+
+    key = hashlib.sha1(endpoint.encode()).hexdigest()[:12]
+    cache_file = FITBIT_CACHE_DIR / f"{date_str}-{key}.json"
+    try:
+        return json_loads(cache_file.read_bytes())
+    except (OSError, ValueError):
+        pass
+
+    result = locked_api_get(endpoint)
+    if not ("summary" in result or "weight" in result):
+        return result
+
+    # A cache we can't write (read-only or full disk) shouldn't lose the data
+    try:
+        FITBIT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(".tmp")
+        tmp.write_bytes(json_dumps(result))
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass
+    return result
+
+
 def get_fitbit_data(date_str):
     """Pull Fitbit stats for the given date."""
     try:
-        from fitbit_api import api_get
+        if api_get is None:
+            raise RuntimeError(f"fitbit_api could not be imported from {FITBIT_DIR}: {_fitbit_import_error!r}")
+
+        endpoints = [
+            f'/1/user/-/activities/date/{date_str}.json',
+            f'/1.2/user/-/sleep/date/{date_str}.json',
+            f'/1/user/-/body/log/weight/date/{date_str}.json',
+        ]
+
+        def fetch(endpoint):
+            # One failing endpoint shouldn't wipe out the other two
+            try:
+                return cached_api_get(endpoint, date_str)
+            except Exception as e:
+                print(f"Fitbit API error for {endpoint}: {e}")
+                return {}
+
+        # The three requests are independent, so overlap their round-trips;
+        # locked_api_get keeps the first real API call on its own
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as ex:
+            activity, sleep_data, weight_data = ex.map(fetch, endpoints)
 
-        activity = api_get(f'/1/user/-/activities/date/{date_str}.json')
         summary = activity.get('summary', {})
-
-        sleep_data = api_get(f'/1.2/user/-/sleep/date/{date_str}.json')
         sleep_minutes = sleep_data.get('summary', {}).get('totalMinutesAsleep', 0)
 
         # Get weight if logged
-        weight_data = api_get(f'/1/user/-/body/log/weight/date/{date_str}.json')
         weight_entries = weight_data.get('weight', [])
         weight = weight_entries[0]['weight'] if weight_entries else None
         # Fitbit returns weight in user's unit (lbs for US)
@@ -230,34 +388,84 @@ def get_fitbit_data(date_str):
         }
 
 
-def update_dashboard(date_str):
-    """Main update function."""
-    print(f"Updating health dashboard for {date_str}...")
+def append_days(raw, entries):
+    """Splice new days onto the end of the raw health-data.json bytes.
 
-    # Load existing data
-    with open(DATA_FILE) as f:
-        data = json.load(f)
+    Prior days are copied as bytes rather than re-serialized. Only handles the
+    indent=2 layout written by update_dashboard, where the file ends with the
+    closing "]" of "days" and then "}"; returns None otherwise, so the caller
+    can do a full rewrite.
+    """
+    tail = raw.rstrip()
+    if not tail.endswith(b"]\n}"):
+        return None
+    head = tail[:-3].rstrip()
+    sep = b"\n    " if head.endswith(b"[") else b",\n    "
+    body = b",\n    ".join(json_dumps(e).replace(b"\n", b"\n    ") for e in entries)
+    return head + sep + body + b"\n  ]\n}\n"
 
-    # Check if date already exists
-    existing_dates = [d["date"] for d in data["days"]]
-    if date_str in existing_dates:
-        print(f"{date_str} already in dashboard, skipping.")
-        return False
 
-    # Parse food log
-    meals, totals = parse_food_log(date_str)
-    if meals is None:
+def write_data(raw):
+    """Replace health-data.json atomically so a crash can't leave it truncated."""
+    tmp = DATA_FILE.with_suffix(".json.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        # Keep the data file's permissions rather than the temp file's umask
+        shutil.copymode(DATA_FILE, tmp)
+        os.replace(tmp, DATA_FILE)
+    except BaseException:
+        # Don't leave a half-written temp file in the source tree
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def build_and_deploy():
+    """Build and deploy the dashboard, unless health-data.json is unchanged since the last deploy."""
+    data_hash = hashlib.blake2b(DATA_FILE.read_bytes(), digest_size=16).hexdigest()
+    try:
+        if DEPLOY_HASH_FILE.read_text() == data_hash:
+            print("Dashboard data unchanged since last deploy, skipping build.")
+            return False
+    except FileNotFoundError:
+        pass
+
+    # Build and deploy run back to back: deploy needs the build output and the
+    # hash can only be recorded after the deploy, so there's nothing to overlap
+    print("Building dashboard...")
+    subprocess.run(["npm", "run", "build"], cwd=DASHBOARD_DIR, check=True)
+    print("Deploying to GitHub Pages...")
+    subprocess.run(["npm", "run", "deploy"], cwd=DASHBOARD_DIR, check=True)
+
+    # Only record the hash once the deploy has actually gone out
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    DEPLOY_HASH_FILE.write_text(data_hash)
+    print("Done!")
+    return True
+
+
+def build_entry(date_str):
+    """Parse the day's log and Fitbit stats into a dashboard entry, or None if there's no log."""
+    # Read the day's log once; food and workouts live in the same file
+    content = load_log(date_str)
+    if content is None:
         print(f"No data for {date_str}, skipping.")
-        return False
+        return None
+
+    sections = split_sections(content)
+
+    # Parse food log
+    meals, totals = parse_food_log(content, sections)
 
     # Parse workouts
-    workouts = parse_workouts(date_str)
+    workouts = parse_workouts(sections)
 
     # Get Fitbit data
     fitbit = get_fitbit_data(date_str)
 
-    # Build entry
-    entry = {
+    return {
         "date": date_str,
         "weight": fitbit["weight"],
         "calories": totals["calories"],
@@ -269,28 +477,60 @@ def update_dashboard(date_str):
         "restingHR": fitbit["restingHR"],
         "activeMinutes": fitbit["activeMinutes"],
         "sleepMinutes": fitbit["sleepMinutes"],
-        "meals": [{"time": m["time"], "name": m["name"], "calories": m["calories"],
-                    "protein": m["protein"], "fat": m["fat"], "carbs": m["carbs"]} for m in meals],
+        "meals": meals,
         "workouts": workouts
     }
 
-    # Append and save
-    data["days"].append(entry)
-    data["days"].sort(key=lambda d: d["date"])
 
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
-    print(f"Added {date_str} to health-data.json")
+def update_dashboard_batch(dates):
+    """Add several days in one pass: one JSON write and one build+deploy for the lot."""
+    # Load existing data
+    with open(DATA_FILE, 'rb') as f:
+        raw = f.read()
+    data = json_loads(raw)
+
+    existing_dates = {d["date"] for d in data["days"]}
+    last_date = data["days"][-1]["date"] if data["days"] else ""
+    new_entries = []
+
+    for date_str in sorted(set(dates)):
+        print(f"Updating health dashboard for {date_str}...")
+
+        # Check if date already exists
+        if date_str in existing_dates:
+            print(f"{date_str} already in dashboard, skipping.")
+            continue
+
+        entry = build_entry(date_str)
+        if entry is not None:
+            new_entries.append(entry)
+            existing_dates.add(date_str)
+
+    # Append and save; out-of-order backfills and files with extra top-level
+    # keys (it's also edited by hand) need a full re-serialize
+    if new_entries:
+        new_raw = None
+        if new_entries[0]["date"] > last_date and list(data) == ["days"]:
+            new_raw = append_days(raw, new_entries)
+        if new_raw is None:
+            for entry in new_entries:
+                bisect.insort(data["days"], entry, key=lambda d: d["date"])
+            new_raw = json_dumps(data) + b"\n"
+        write_data(new_raw)
+        for entry in new_entries:
+            print(f"Added {entry['date']} to health-data.json")
+
+    # Build and deploy once for the whole batch. This also runs when nothing
+    # was added, in case a previous run wrote entries but failed to deploy them.
+    build_and_deploy()
+    return bool(new_entries)
 
-    # Build and deploy
-    print("Building dashboard...")
-    subprocess.run(["npm", "run", "build"], cwd=DASHBOARD_DIR, check=True)
-    print("Deploying to GitHub Pages...")
-    subprocess.run(["npm", "run", "deploy"], cwd=DASHBOARD_DIR, check=True)
-    print("Done!")
-    return True
+
+def update_dashboard(date_str):
+    """Main update function."""
+    return update_dashboard_batch([date_str])
 
 
 if __name__ == "__main__":
-    target_date = sys.argv[1] if len(sys.argv) > 1 else get_yesterday()
-    update_dashboard(target_date)
+    target_dates = sys.argv[1:] or [get_yesterday()]
+    update_dashboard_batch(target_dates)